@@ -1,25 +1,48 @@
 #!/usr/bin/env python
 
 import re
+from collections import defaultdict
 from inspect import getdoc
 from urlparse import urlparse
 
+_ROUTE_PARAM_RE = re.compile(r'<(?:[^>]*:)?([^>:]+)>')
+_ALLOWED_METHODS = frozenset(['GET', 'POST', 'PUT', 'DELETE'])
+
+
+def _add_directive(doc, line):
+    """Add the directive in line, which starts with :, to doc"""
+    key, sep, rest = line.partition(' ')
+    if not sep or not key[1:].replace('_', 'a').isalnum():
+        return
+    name, _, value = rest.partition(':')
+    if value.startswith(' '):
+        value = value[1:]
+    doc[key].append((name, value))
+
 
 def parse_doc(lines):
-    """Create a data structure from a Sphinx-style docstring"""
-    doc = {}
+    """Create a data structure from a Sphinx-style docstring, mapping each
+    directive to a list of (name, value) tuples
+    """
+    doc = defaultdict(list)
+    for line in lines:
+        if line.startswith(':'):
+            _add_directive(doc, line)
+    return dict(doc)
+
+
+def _parse_operation_doc(lines):
+    """Split a Sphinx-style docstring into its summary and the data structure
+    returned by parse_doc, in a single pass over lines
+    """
+    summary = []
+    doc = defaultdict(list)
     for line in lines:
-        m = re.match(r'^(:\w+) ([^:]*)(?:: ?)?(.*)$', line)
-        if m is None:
-            continue
-        key, name, value = m.groups()
-        if key not in doc:
-            doc[key] = []
-        doc[key].append({
-            'name': name,
-            'value': value
-        })
-    return doc
+        if line.startswith(':'):
+            _add_directive(doc, line)
+        else:
+            summary.append(line)
+    return '\n'.join(summary).strip(), dict(doc)
 
 
 def parameterize(path):
@@ -27,12 +50,7 @@ def parameterize(path):
     For example the Flask route /api/v1/users/<int:user_id> is translated to
     /api/v1/users/{user_id}
     """
-    def fparam(p):
-        if p.startswith('<') and p.endswith('>'):
-            _, _, parameter = p.strip('<>').rpartition(':')
-            return '{%s}' % (parameter,)
-        return p
-    return '/'.join(map(fparam, path.split('/')))
+    return _ROUTE_PARAM_RE.sub(r'{\1}', path)
 
 
 def lremove(s, prefix):
@@ -42,73 +60,74 @@ def lremove(s, prefix):
 
 class APIEndpoint(object):
 
-    def __init__(self, app, rule, prefix):
+    def __init__(self, app, rule, prefix, _path=None):
+        """Create endpoint for rule, with prefix removed from its path. If
+        _path is given it must be str(rule) and start with prefix, which must
+        not have a trailing /
+        """
         self.app = app
         self.rule = rule
-        # Keep leading / for endpoint paths
-        if prefix.endswith('/'):
-            prefix = prefix[:-1]
-        self.path = parameterize(lremove(str(rule), prefix))
-
-    def _filter_methods(self, methods=('GET', 'POST', 'PUT', 'DELETE')):
+        if _path is None:
+            # Keep leading / for endpoint paths
+            if prefix.endswith('/'):
+                prefix = prefix[:-1]
+            path = str(rule)
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+        else:
+            path = _path[len(prefix):]
+        self.path = parameterize(path)
+
+    def _filter_methods(self, methods=_ALLOWED_METHODS):
         """Filter methods to generate endpoints for"""
         return self.rule.methods.intersection(methods)
 
-    def _make_parameters(self, lines):
+    def _make_parameters(self, doc):
         """Make parameters from :param lines"""
-        doc = parse_doc(lines)
+        def _values(key):
+            # Reversed so that the first occurrence of a name wins
+            return dict(reversed(doc.get(key, [])))
 
-        def _get_value(key, name, default=None):
-            for p in doc.get(key, []):
-                if p.get('name') == name:
-                    return p.get('value', default)
-            return default
+        paramtypes = _values(':paramtype')
+        types = _values(':type')
+        defaults = _values(':default')
+        required_names = set(name for name, _ in doc.get(':required', []))
 
         def make_parameter(param_type, name, value):
-            required = (param['name'] for param in doc.get(':required', []))
             return {
-                'paramType': _get_value(':paramtype', name, param_type),
+                'paramType': paramtypes.get(name, param_type),
                 'name': name,
                 'description': value,
-                'dataType': _get_value(':type', name, 'string'),
-                'defaultValue': _get_value(':default', name, ''),
-                'required': param_type == 'path' or name in required
+                'dataType': types.get(name, 'string'),
+                'defaultValue': defaults.get(name, ''),
+                'required': param_type == 'path' or name in required_names
             }
 
         parameters = []
+        arguments = self.rule.arguments
 
-        for query in doc.get(':param', []):
-            name = query.get('name')
-            param_type = 'path' if name in self.rule.arguments else 'query'
-            parameters.append(make_parameter(param_type, name,
-                                             query.get('value', '')))
+        for name, value in doc.get(':param', []):
+            param_type = 'path' if name in arguments else 'query'
+            parameters.append(make_parameter(param_type, name, value))
         return parameters
 
-    def _make_status_codes(self, lines):
+    def _make_status_codes(self, doc):
         """Make status code from :statuscode lines"""
-        doc = parse_doc(lines)
         status_codes = []
-        for status_code in doc.get(':statuscode', []):
+        for code, message in doc.get(':statuscode', []):
             status_codes.append({
-                'code': status_code.get('name'),
-                'message': status_code.get('value', '')
+                'code': code,
+                'message': message
             })
         return status_codes
 
-    def _make_summary(self, lines):
-        """Make summary from lines that are not directives"""
-        return '\n'.join((line for line in lines
-                         if not line.startswith(':'))).strip()
-
-    def _make_notes(self, lines):
-        notes = (param['name'] or param['value']
-                 for param in parse_doc(lines).get(':notes', []))
+    def _make_notes(self, doc):
+        notes = [name or value for name, value in doc.get(':notes', [])]
         return ' '.join(notes)
 
-    def _make_operation(self, method):
-        """Make operation based on the given method"""
-        view_function = self.app.view_functions.get(self.rule.endpoint)
-
+    def _make_operation(self, method, summary, doc):
+        """Make operation based on the given method, summary and parsed
+        docstring"""
         operation = {
             'method': method,
             'nickname': self.rule.endpoint,
@@ -116,18 +135,25 @@ class APIEndpoint(object):
             'summary': '',
             'responseMessages': []
         }
+        # Undocumented view functions get the default operation
+        if not summary and not doc:
+            return operation
 
-        lines = [line for line in (getdoc(view_function) or '').splitlines()]
-        operation['summary'] = self._make_summary(lines)
-        notes = self._make_notes(lines)
+        operation['summary'] = summary
+        notes = self._make_notes(doc)
         if len(notes) > 0:
             operation['notes'] = notes
-        operation['parameters'] = self._make_parameters(lines)
-        operation['responseMessages'] = self._make_status_codes(lines)
+        operation['parameters'] = self._make_parameters(doc)
+        operation['responseMessages'] = self._make_status_codes(doc)
         return operation
 
     def make_operations(self):
-        return [self._make_operation(m) for m in self._filter_methods()]
+        # The docstring is shared by all methods of the rule, so parse it once
+        view_function = self.app.view_functions.get(self.rule.endpoint)
+        lines = (getdoc(view_function) or '').splitlines()
+        summary, doc = _parse_operation_doc(lines)
+        return [self._make_operation(m, summary, doc)
+                for m in self._filter_methods()]
 
 
 class APIBuilder(object):
@@ -135,12 +161,18 @@ class APIBuilder(object):
     def __init__(self, app, prefix):
         self.app = app
         self.prefix = prefix
+        # Keep leading / for endpoint paths
+        self._endpoint_prefix = prefix[:-1] if prefix.endswith('/') else prefix
 
     def _find_endpoints(self):
         """Find and create API endpoints for routes that match prefix"""
-        return sorted([APIEndpoint(self.app, rule, self.prefix)
-                for rule in self.app.url_map.iter_rules()
-                if str(rule).startswith(self.prefix)], key=lambda x:x.rule.rule)
+        rules = sorted(((path, rule) for rule in self.app.url_map.iter_rules()
+                        for path in (str(rule),)
+                        if path.startswith(self.prefix)),
+                       key=lambda x: x[1].rule)
+        for path, rule in rules:
+            yield APIEndpoint(self.app, rule, self._endpoint_prefix,
+                              _path=path)
 
     def make_apis(self, description=None):
         """Make all APIs"""
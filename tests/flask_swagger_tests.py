@@ -4,9 +4,10 @@ import unittest
 from inspect import getdoc
 
 from flask import Flask
+from werkzeug.routing import Rule
 
-from flask_swagger import (APIBuilder, APIEndpoint, lremove, make_resources,
-                           parameterize, parse_doc)
+from flask_swagger import (APIBuilder, APIEndpoint, _parse_operation_doc,
+                           lremove, make_resources, parameterize, parse_doc)
 
 
 class SwaggerGenTestCase(unittest.TestCase):
@@ -32,24 +33,24 @@ class SwaggerGenTestCase(unittest.TestCase):
     def test_parse_doc(self):
         self.assertEqual({}, parse_doc([]))
         self.assertEqual({}, parse_doc(['spam', 'eggs']))
-        self.assertEqual({':param': [{'name': 'ham',
-                                      'value': 'eggs and spam'}]},
+        self.assertEqual({':param': [('ham', 'eggs and spam')]},
                          parse_doc([':param ham: eggs and spam']))
-        self.assertEqual({':param': [{'name': 'ham', 'value': ''}]},
+        self.assertEqual({':param': [('ham', '')]},
                          parse_doc([':param ham:']))
+        self.assertEqual({}, parse_doc([':param', ':bad-key ham: eggs']))
 
         parameters = parse_doc(self.doc)
-        self.assertEqual([{'name': 'user_id', 'value': 'User ID'},
-                          {'name': 'username', 'value': 'Lookup by username'}],
+        self.assertEqual([('user_id', 'User ID'),
+                          ('username', 'Lookup by username')],
                          parameters[':param'])
-        self.assertEqual([{'name': 'user_id', 'value': ''}],
+        self.assertEqual([('user_id', '')],
                          parameters[':required'])
-        self.assertEqual([{'name': '200', 'value': 'Successful response'},
-                          {'name': '404', 'value': 'No such user'}],
+        self.assertEqual([('200', 'Successful response'),
+                          ('404', 'No such user')],
                          parameters[':statuscode'])
-        self.assertEqual([{'name': 'Implementation notes', 'value': ''},
-                          {'name': 'More implementation notes', 'value': ''},
-                          {'name': '', 'value': 'Note with: colon'}],
+        self.assertEqual([('Implementation notes', ''),
+                          ('More implementation notes', ''),
+                          ('', 'Note with: colon')],
                          parameters[':notes'])
 
     def test_parameterize(self):
@@ -58,6 +59,12 @@ class SwaggerGenTestCase(unittest.TestCase):
                          parameterize('/api/users/<user_id>'))
         self.assertEqual('/api/users/{user_id}',
                          parameterize('/api/users/<int:user_id>'))
+        self.assertEqual('/api/users/{user_id}/roles/{role}',
+                         parameterize('/api/users/<int:user_id>/roles/<role>'))
+        self.assertEqual('/api/files/{name}',
+                         parameterize('/api/files/<regex("a:b"):name>'))
+        self.assertEqual('/api/files/{name}.json',
+                         parameterize('/api/files/<name>.json'))
 
     def test_lremove(self):
         self.assertEqual('/api/v1/users', lremove('/api/v1/users', ''))
@@ -84,15 +91,25 @@ class APIEndpointTestCase(unittest.TestCase):
         self.endpoint = APIEndpoint(None, None, '/api/users/<int:user_id>')
 
     def test_make_status_codes(self):
-        self.assertEqual([], self.endpoint._make_status_codes([]))
-        self.assertEqual([], self.endpoint._make_status_codes(['foo', 'bar']))
+        self.assertEqual([], self.endpoint._make_status_codes({}))
+        self.assertEqual([], self.endpoint._make_status_codes(
+            parse_doc(['foo', 'bar'])))
         self.assertEqual([{'code': '200', 'message': 'Successful response'},
                           {'code': '404', 'message': 'No such user'}],
-                         self.endpoint._make_status_codes(self.doc))
+                         self.endpoint._make_status_codes(
+                             parse_doc(self.doc)))
 
-    def test_make_summary(self):
-        self.assertEqual('Retrieve an user',
-                         self.endpoint._make_summary(self.doc))
+    def test_prefix(self):
+        rule = Rule('/api/users/<int:user_id>')
+        self.assertEqual('/users/{user_id}',
+                         APIEndpoint(None, rule, '/api/').path)
+        self.assertEqual('/users/{user_id}',
+                         APIEndpoint(None, rule, '/api').path)
+
+    def test_parse_operation_doc(self):
+        summary, doc = _parse_operation_doc(self.doc)
+        self.assertEqual('Retrieve an user', summary)
+        self.assertEqual(parse_doc(self.doc), doc)
 
 
 class APIBuilderTestCase(unittest.TestCase):
@@ -137,7 +154,7 @@ class APIBuilderTestCase(unittest.TestCase):
         self.builder = APIBuilder(self.app, '/api')
 
     def test_find_endpoints(self):
-        endpoints = self.builder._find_endpoints()
+        endpoints = list(self.builder._find_endpoints())
         self.assertEqual(2, len(endpoints))
         self.assertEqual(self.app, endpoints[0].app)
         self.assertEqual('/users/{user_id}', endpoints[0].path)
@@ -176,6 +193,39 @@ class APIBuilderTestCase(unittest.TestCase):
             'path': '/users/{user_id}/avatar', 'description': None}
         self.assertEqual(expected, self.builder.make_apis()[1])
 
+    def test_make_operations_methods(self):
+        @self.app.route('/api/groups', methods=['GET', 'POST'])
+        def groups():
+            """
+            List or create groups
+
+            :param name: Group name
+            :statuscode 200: Successful response
+            """
+        endpoint = [e for e in self.builder._find_endpoints()
+                    if e.path == '/groups'][0]
+        operations = sorted(endpoint.make_operations(),
+                            key=lambda o: o['method'])
+        self.assertEqual(['GET', 'POST'], [o['method'] for o in operations])
+        for operation in operations:
+            self.assertEqual('List or create groups', operation['summary'])
+            self.assertEqual(['name'],
+                             [p['name'] for p in operation['parameters']])
+            self.assertEqual([{'code': '200',
+                               'message': 'Successful response'}],
+                             operation['responseMessages'])
+
+    def test_make_operations_no_docstring(self):
+        @self.app.route('/api/ping')
+        def ping():
+            pass
+        endpoint = [e for e in self.builder._find_endpoints()
+                    if e.path == '/ping'][0]
+        self.assertEqual([{'method': 'GET', 'nickname': 'ping',
+                           'parameters': [], 'summary': '',
+                           'responseMessages': []}],
+                         endpoint.make_operations())
+
 
 class SwaggerGenIntegrationTestCase(unittest.TestCase):
 